@@ -8,15 +8,24 @@
 3. 提供 API 給前端使用
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-import json
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, abort
+from flask_compress import Compress
+import hashlib
+import hmac
 import os
+import tempfile
+import threading
+import time
+import orjson
 from datetime import datetime
 
 # 建立 Flask 應用程式
 app = Flask(__name__)
 # 設定 session 密鑰（用於登入狀態）
 app.secret_key = 'teacher_quota_system_secret_key_2024'
+# 超過 1KB 的回應自動壓縮（含中文的 JSON 壓縮後約只剩 1/5 到 1/10）
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
 
 # ============================================================
 # 資料檔案路徑設定
@@ -26,13 +35,38 @@ COURSES_FILE = os.path.join(DATA_DIR, 'courses.json')
 TEACHERS_FILE = os.path.join(DATA_DIR, 'teachers.json')
 SETTINGS_FILE = os.path.join(DATA_DIR, 'settings.json')
 
+# settings.json 中和密碼有關的設定，不可以回傳給前端
+# admin_password 是舊版的明文密碼，新版改存雜湊值 admin_password_hash
+PASSWORD_SETTING_KEYS = ('admin_password', 'admin_password_hash')
+
+# JSON 檔案快取：{檔案路徑: (修改時間, 檔案大小, 解析後的資料)}
+# 檔案沒有變動時直接回傳快取，不必每次請求都重新讀檔解析
+_JSON_CACHE = {}
+
+# 領域索引快取：{檔案路徑: (建立索引用的資料, {領域 ID: 在 domains 列表中的位置})}
+# 索引放在資料以外，不會修改到快取中的資料，也不會被存檔或回傳給前端
+_DOMAIN_INDEX_CACHE = {}
+
+# 節數摘要快取：{檔案路徑: (計算摘要用的資料, 摘要)}
+# 教師資料檔變動（含手動修改或還原備份）時會重新計算，摘要不寫進資料檔
+_SUMMARY_CACHE = {}
+
+# 今天日期字串的快取：[產生時間, 'YYYY-MM-DD']
+_TODAY_CACHE = [0.0, '']
+
+# Flask 會用多個執行緒處理請求，寫入資料檔時要上鎖
+_JSON_LOCK = threading.Lock()
+
 
 # ============================================================
 # 輔助函數：讀取和儲存 JSON 檔案
 # ============================================================
 
 def load_json_file(filepath):
-    """讀取 JSON 檔案
+    """讀取 JSON 檔案（有快取）
+
+    檔案的修改時間和大小都沒變時，直接回傳快取中的資料。
+    注意：回傳的是快取本身，其他請求可能正在讀取，請不要直接修改。
 
     Args:
         filepath: JSON 檔案的路徑
@@ -40,12 +74,19 @@ def load_json_file(filepath):
         讀取到的資料（字典或列表）
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        file_stat = os.stat(filepath)
+        cached = _JSON_CACHE.get(filepath)
+        if cached and cached[0] == file_stat.st_mtime_ns and cached[1] == file_stat.st_size:
+            return cached[2]
+
+        with open(filepath, 'rb') as f:
+            data = orjson.loads(f.read())
+        _JSON_CACHE[filepath] = (file_stat.st_mtime_ns, file_stat.st_size, data)
+        return data
     except FileNotFoundError:
         # 如果檔案不存在，回傳空字典
         return {}
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         # 如果 JSON 格式錯誤，回傳空字典
         return {}
 
@@ -53,23 +94,176 @@ def load_json_file(filepath):
 def save_json_file(filepath, data):
     """儲存資料到 JSON 檔案
 
+    先寫到暫存檔、確認寫入磁碟後再改名取代原檔，
+    這樣即使寫到一半當機，原本的檔案也不會損壞。
+
     Args:
         filepath: 要儲存的檔案路徑
         data: 要儲存的資料
     Returns:
         True 表示成功，False 表示失敗
     """
+    temp_path = None
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            # indent=2 讓 JSON 格式更易讀
-            # ensure_ascii=False 讓中文正常顯示
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # OPT_INDENT_2 讓 JSON 格式更易讀（orjson 預設就會直接輸出中文）
+        # OPT_NON_STR_KEYS 允許非字串的鍵（如數字）
+        content = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+        # 在同一個資料夾建立名稱不重複的暫存檔，同時有多個寫入也不會互相干擾
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix='.tmp')
+        # mkstemp 建立的檔案只有自己能讀，改回一般資料檔的權限
+        os.chmod(temp_path, 0o644)
+
+        # 一次寫入整份內容，再用 fsync 確保資料真的寫到磁碟
+        try:
+            written = 0
+            while written < len(content):
+                written += os.write(fd, content[written:])
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        # 改名是原子操作：讀取的人只會看到舊檔或新檔，不會看到寫一半的檔案
+        os.replace(temp_path, filepath)
+
+        # 寫入成功後直接更新快取，下次讀取就不必重新解析
+        file_stat = os.stat(filepath)
+        _JSON_CACHE[filepath] = (file_stat.st_mtime_ns, file_stat.st_size, data)
         return True
     except Exception as e:
         print(f"儲存檔案時發生錯誤：{e}")
+        # 清除沒寫完的暫存檔
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
         return False
 
 
+def find_domain_position(filepath, teachers_data, domain_id):
+    """依領域 ID 找出領域在 domains 列表中的位置
+
+    索引依資料建立一次後存在 _DOMAIN_INDEX_CACHE，之後直接查表，
+    不必逐一比對。資料換了（檔案被修改）就重新建立索引。
+
+    Args:
+        filepath: 教師資料檔路徑
+        teachers_data: 教師資料（由 load_json_file(filepath) 取得）
+        domain_id: 領域的識別碼（如 'chinese_social'）
+    Returns:
+        位置（整數），找不到則回傳 None
+    """
+    cached = _DOMAIN_INDEX_CACHE.get(filepath)
+    # 用 is 確認索引是由同一份資料建立的
+    if cached and cached[0] is teachers_data:
+        domain_index = cached[1]
+    else:
+        domain_index = {}
+        for position, domain in enumerate(teachers_data.get('domains', [])):
+            domain_index[domain.get('id')] = position
+        _DOMAIN_INDEX_CACHE[filepath] = (teachers_data, domain_index)
+
+    return domain_index.get(domain_id)
+
+
+def json_response(data):
+    """用 orjson 產生 JSON 回應
+
+    比 jsonify 快，適合回傳較大的資料
+
+    Args:
+        data: 要回傳的資料
+    Returns:
+        Flask Response 物件
+    """
+    return Response(orjson.dumps(data), mimetype='application/json')
+
+
+def get_request_json():
+    """用 orjson 讀取請求內容中的 JSON
+
+    比 request.get_json() 快；cache=False 讓 Flask 不必保留原始內容，
+    上傳大量教師資料時比較省記憶體
+
+    Returns:
+        解析後的資料（JSON 格式錯誤時回傳 400）
+    """
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        abort(400)
+
+
+def get_today_string():
+    """取得今天日期字串（YYYY-MM-DD）
+
+    結果最多快取 60 秒，不必每次寫入都重新格式化日期
+
+    Returns:
+        今天日期，例如 '2024-08-01'
+    """
+    now = time.time()
+    if now - _TODAY_CACHE[0] > 60:
+        _TODAY_CACHE[0] = now
+        _TODAY_CACHE[1] = datetime.now().strftime('%Y-%m-%d')
+    return _TODAY_CACHE[1]
+
+
+def json_file_response(filepath, data):
+    """回傳 JSON 資料檔的內容，並加上 ETag
+
+    ETag 由檔案的修改時間和大小組成。瀏覽器下次請求時會帶上 ETag，
+    資料沒變就回傳 304（不含內容），瀏覽器直接使用自己的快取
+
+    Args:
+        filepath: 資料檔路徑
+        data: 要回傳的資料（由 load_json_file(filepath) 取得）
+    Returns:
+        Flask Response 物件
+    """
+    response = json_response(data)
+    # 每次都要向伺服器確認資料有沒有變
+    response.cache_control.no_cache = True
+
+    # 確認快取中的資料就是要回傳的資料，ETag 才會和內容一致
+    cached = _JSON_CACHE.get(filepath)
+    if cached and cached[2] is data:
+        response.set_etag(f'{cached[0]}-{cached[1]}')
+        response.make_conditional(request)
+    return response
+
+
+def hash_password(password):
+    """計算密碼的 SHA-256 雜湊值
+
+    Args:
+        password: 密碼（文字）
+    Returns:
+        雜湊值（64 個字元的十六進位文字）
+    """
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+
+def get_admin_password_hash(settings):
+    """取得管理員密碼的雜湊值
+
+    優先使用 admin_password_hash；舊版設定檔只有明文的 admin_password 時，
+    改用它的雜湊值。兩個都沒有時不提供預設密碼。
+
+    Args:
+        settings: 系統設定
+    Returns:
+        雜湊值，沒有設定密碼則回傳 None
+    """
+    password_hash = settings.get('admin_password_hash')
+    if isinstance(password_hash, str) and password_hash:
+        return password_hash
+
+    legacy_password = settings.get('admin_password')
+    if isinstance(legacy_password, str) and legacy_password:
+        return hash_password(legacy_password)
+
+    return None
+
+
 def is_admin():
     """檢查目前使用者是否為管理員（教務主任）
 
@@ -79,6 +273,111 @@ def is_admin():
     return session.get('is_admin', False)
 
 
+def compute_summary(teachers_data):
+    """計算節數總覽摘要
+
+    計算各領域的節數差異和整體統計。
+    通常透過 get_summary() 取得有快取的結果。
+
+    Args:
+        teachers_data: 教師資料（teachers.json 的內容）
+    Returns:
+        摘要資料（字典）
+    """
+    summary = {
+        'school_year': teachers_data.get('school_year', 115),
+        'domains': [],
+        'total_base': 0,
+        'total_required': 0,
+        'total_difference': 0
+    }
+
+    for domain in teachers_data.get('domains', []):
+        base = domain.get('total_base_hours', 0)
+        required = domain.get('required_hours', 0)
+        difference = required - base
+        teacher_count = len(domain.get('teachers', []))
+
+        # 計算平均超時（如果需求大於基本節數）
+        avg_overtime = 0
+        if difference > 0 and teacher_count > 0:
+            avg_overtime = round(difference / teacher_count, 2)
+
+        domain_summary = {
+            'id': domain.get('id', ''),
+            'name': domain.get('name', ''),
+            'base_hours': base,
+            'required_hours': required,
+            'difference': difference,
+            'teacher_count': teacher_count,
+            'avg_overtime': avg_overtime,
+            'status': 'shortage' if difference > 0 else ('surplus' if difference < 0 else 'balanced')
+        }
+
+        summary['domains'].append(domain_summary)
+        summary['total_base'] += base
+        summary['total_required'] += required
+
+    summary['total_difference'] = summary['total_required'] - summary['total_base']
+
+    return summary
+
+
+def get_summary(filepath, teachers_data):
+    """取得節數摘要（有快取）
+
+    同一份資料只計算一次，資料換了（檔案被修改）就重新計算
+
+    Args:
+        filepath: 教師資料檔路徑
+        teachers_data: 教師資料（由 load_json_file(filepath) 取得）
+    Returns:
+        摘要資料（字典）
+    """
+    cached = _SUMMARY_CACHE.get(filepath)
+    # 用 is 確認摘要是由同一份資料算出來的
+    if cached and cached[0] is teachers_data:
+        return cached[1]
+
+    summary = compute_summary(teachers_data)
+    _SUMMARY_CACHE[filepath] = (teachers_data, summary)
+    return summary
+
+
+def count_formal_teachers(formal_teachers):
+    """統計正式教師的進修部人數和基本節數
+
+    只跑一次迴圈就同時算出兩個數字
+
+    Args:
+        formal_teachers: 正式教師列表
+    Returns:
+        (進修部教師數, 基本節數總和)
+    """
+    evening_count = 0
+    total_base_hours = 0
+    for teacher in formal_teachers:
+        if teacher.get('is_evening', False):
+            evening_count += 1
+        total_base_hours += teacher.get('base_hours', 0)
+    return evening_count, total_base_hours
+
+
+def warm_json_cache():
+    """啟動時先把所有資料檔讀進快取
+
+    搭配 gunicorn 的 preload_app（見 gunicorn_conf.py），
+    主行程讀好的資料會直接帶到 worker，第一個請求就不必讀檔
+    """
+    for filepath in (COURSES_FILE, TEACHERS_FILE, SETTINGS_FILE):
+        load_json_file(filepath)
+    # 節數摘要也先算好
+    get_summary(TEACHERS_FILE, load_json_file(TEACHERS_FILE))
+
+
+warm_json_cache()
+
+
 # ============================================================
 # 網頁路由（頁面）
 # ============================================================
@@ -135,13 +434,17 @@ def api_login():
 
     驗證密碼，成功則設定 session
     """
-    data = request.get_json()
+    data = get_request_json()
     password = data.get('password', '')
 
     settings = load_json_file(SETTINGS_FILE)
-    correct_password = settings.get('admin_password', 'admin123')
+    correct_hash = get_admin_password_hash(settings)
 
-    if password == correct_password:
+    # 比對雜湊而不是比對明文密碼
+    # compare_digest 的比對時間固定，避免被用回應時間猜出密碼
+    # 沒有設定密碼或密碼不是文字時，一律視為密碼錯誤
+    if correct_hash and isinstance(password, str) and hmac.compare_digest(
+            hash_password(password).encode('utf-8'), correct_hash.encode('utf-8')):
         session['is_admin'] = True
         return jsonify({'success': True, 'message': '登入成功'})
     else:
@@ -162,7 +465,7 @@ def api_logout():
 def api_get_teachers():
     """取得教師資料 API"""
     teachers_data = load_json_file(TEACHERS_FILE)
-    return jsonify(teachers_data)
+    return json_file_response(TEACHERS_FILE, teachers_data)
 
 
 @app.route('/api/teachers', methods=['POST'])
@@ -171,10 +474,16 @@ def api_update_teachers():
     if not is_admin():
         return jsonify({'success': False, 'message': '需要管理員權限'}), 403
 
-    data = request.get_json()
-    data['last_updated'] = datetime.now().strftime('%Y-%m-%d')
+    data = get_request_json()
+    # 舊版會把摘要存進資料檔，前端可能原樣傳回來，現在改由伺服器計算
+    data.pop('_summary', None)
+    data['last_updated'] = get_today_string()
+
+    # 上鎖避免和其他寫入同時進行
+    with _JSON_LOCK:
+        saved = save_json_file(TEACHERS_FILE, data)
 
-    if save_json_file(TEACHERS_FILE, data):
+    if saved:
         return jsonify({'success': True, 'message': '儲存成功'})
     else:
         return jsonify({'success': False, 'message': '儲存失敗'}), 500
@@ -184,7 +493,7 @@ def api_update_teachers():
 def api_get_courses():
     """取得課程資料 API"""
     courses_data = load_json_file(COURSES_FILE)
-    return jsonify(courses_data)
+    return json_file_response(COURSES_FILE, courses_data)
 
 
 @app.route('/api/courses', methods=['POST'])
@@ -193,10 +502,13 @@ def api_update_courses():
     if not is_admin():
         return jsonify({'success': False, 'message': '需要管理員權限'}), 403
 
-    data = request.get_json()
-    data['last_updated'] = datetime.now().strftime('%Y-%m-%d')
+    data = get_request_json()
+    data['last_updated'] = get_today_string()
 
-    if save_json_file(COURSES_FILE, data):
+    with _JSON_LOCK:
+        saved = save_json_file(COURSES_FILE, data)
+
+    if saved:
         return jsonify({'success': True, 'message': '儲存成功'})
     else:
         return jsonify({'success': False, 'message': '儲存失敗'}), 500
@@ -212,42 +524,53 @@ def api_update_domain(domain_id):
     if not is_admin():
         return jsonify({'success': False, 'message': '需要管理員權限'}), 403
 
-    data = request.get_json()
-    teachers_data = load_json_file(TEACHERS_FILE)
-
-    # 找到對應的領域並更新
-    for domain in teachers_data.get('domains', []):
-        if domain.get('id') == domain_id:
-            # 更新領域資料（如果有提供的話）
-            if 'total_base_hours' in data:
-                domain['total_base_hours'] = data['total_base_hours']
-            if 'required_hours' in data:
-                domain['required_hours'] = data['required_hours']
-            if 'note' in data:
-                domain['note'] = data['note']
-
-            # 更新正式教師（直接替換整個列表，支援新增/刪除）
-            if 'formal_teachers' in data:
-                domain['formal_teachers'] = data['formal_teachers']
-                # 重新計算正式教師數和進修部教師數
-                domain['formal_count'] = len(data['formal_teachers'])
-                domain['evening_formal_count'] = sum(
-                    1 for t in data['formal_teachers'] if t.get('is_evening', False)
-                )
-                # 重新計算基本節數
-                domain['total_base_hours'] = sum(
-                    t.get('base_hours', 0) for t in data['formal_teachers']
-                )
-
-            # 更新代理教師（直接替換整個列表，支援新增/刪除/啟用停用）
-            if 'substitute_teachers' in data:
-                domain['substitute_teachers'] = data['substitute_teachers']
-                domain['substitute_count'] = len(data['substitute_teachers'])
-            break
-
-    teachers_data['last_updated'] = datetime.now().strftime('%Y-%m-%d')
-
-    if save_json_file(TEACHERS_FILE, teachers_data):
+    data = get_request_json()
+
+    with _JSON_LOCK:
+        cached_data = load_json_file(TEACHERS_FILE)
+
+        # 用索引直接找到對應的領域
+        position = find_domain_position(TEACHERS_FILE, cached_data, domain_id)
+        if position is None:
+            return jsonify({'success': False, 'message': '找不到此領域'}), 404
+
+        # 快取的資料可能正被其他請求讀取，不直接修改：
+        # 只複製外層資料、領域列表和要修改的領域，其他領域沿用原本的資料
+        teachers_data = dict(cached_data)
+        teachers_data['domains'] = list(cached_data['domains'])
+        domain = dict(cached_data['domains'][position])
+        teachers_data['domains'][position] = domain
+
+        # 更新領域資料（如果有提供的話）
+        if 'total_base_hours' in data:
+            domain['total_base_hours'] = data['total_base_hours']
+        if 'required_hours' in data:
+            domain['required_hours'] = data['required_hours']
+        if 'note' in data:
+            domain['note'] = data['note']
+
+        # 更新正式教師（直接替換整個列表，支援新增/刪除）
+        if 'formal_teachers' in data:
+            domain['formal_teachers'] = data['formal_teachers']
+            # 重新計算正式教師數、進修部教師數和基本節數
+            evening_count, total_base_hours = count_formal_teachers(data['formal_teachers'])
+            domain['formal_count'] = len(data['formal_teachers'])
+            domain['evening_formal_count'] = evening_count
+            domain['total_base_hours'] = total_base_hours
+
+        # 更新代理教師（直接替換整個列表，支援新增/刪除/啟用停用）
+        if 'substitute_teachers' in data:
+            domain['substitute_teachers'] = data['substitute_teachers']
+            domain['substitute_count'] = len(data['substitute_teachers'])
+
+        # 移除舊版存在資料檔中的摘要（teachers_data 是複製的，不影響快取）
+        teachers_data.pop('_summary', None)
+        teachers_data['last_updated'] = get_today_string()
+
+        # 直接寫回磁碟，成功後快取才會換成新資料
+        saved = save_json_file(TEACHERS_FILE, teachers_data)
+
+    if saved:
         return jsonify({'success': True, 'message': '更新成功'})
     else:
         return jsonify({'success': False, 'message': '更新失敗'}), 500
@@ -258,7 +581,7 @@ def api_get_settings():
     """取得系統設定 API"""
     settings = load_json_file(SETTINGS_FILE)
     # 不要回傳密碼給前端
-    settings_safe = {k: v for k, v in settings.items() if k != 'admin_password'}
+    settings_safe = {k: v for k, v in settings.items() if k not in PASSWORD_SETTING_KEYS}
     return jsonify(settings_safe)
 
 
@@ -269,44 +592,8 @@ def api_get_summary():
     計算各領域的節數差異和整體統計
     """
     teachers_data = load_json_file(TEACHERS_FILE)
-
-    summary = {
-        'school_year': teachers_data.get('school_year', 115),
-        'domains': [],
-        'total_base': 0,
-        'total_required': 0,
-        'total_difference': 0
-    }
-
-    for domain in teachers_data.get('domains', []):
-        base = domain.get('total_base_hours', 0)
-        required = domain.get('required_hours', 0)
-        difference = required - base
-        teacher_count = len(domain.get('teachers', []))
-
-        # 計算平均超時（如果需求大於基本節數）
-        avg_overtime = 0
-        if difference > 0 and teacher_count > 0:
-            avg_overtime = round(difference / teacher_count, 2)
-
-        domain_summary = {
-            'id': domain.get('id', ''),
-            'name': domain.get('name', ''),
-            'base_hours': base,
-            'required_hours': required,
-            'difference': difference,
-            'teacher_count': teacher_count,
-            'avg_overtime': avg_overtime,
-            'status': 'shortage' if difference > 0 else ('surplus' if difference < 0 else 'balanced')
-        }
-
-        summary['domains'].append(domain_summary)
-        summary['total_base'] += base
-        summary['total_required'] += required
-
-    summary['total_difference'] = summary['total_required'] - summary['total_base']
-
-    return jsonify(summary)
+    summary = get_summary(TEACHERS_FILE, teachers_data)
+    return json_response(summary)
 
 
 # ============================================================
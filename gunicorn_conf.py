@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 設定檔
+
+啟動方式：gunicorn -c gunicorn_conf.py app:app
+"""
+
+# 只用 1 個 worker 行程，靠多個執行緒同時處理請求。
+# app.py 的資料快取和寫檔用的鎖（_JSON_LOCK）都只在同一個行程內有效，
+# 多個行程同時修改 teachers.json 可能互相覆蓋，所以不要調高 workers
+workers = 1
+worker_class = 'gthread'
+threads = 16
+
+# 先在主行程載入 app.py（包含已讀入快取的 JSON 資料），
+# worker 啟動時就有現成的資料，第一個請求不必讀檔
+preload_app = True
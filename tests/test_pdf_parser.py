@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+utils/pdf_parser.py 的測試
+
+需要先安裝測試用套件：pip install -r requirements-dev.txt
+執行方式：python -m pytest
+"""
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from utils.pdf_parser import has_wrapped_cells, parse_curriculum_pdf
+
+
+def build_table_pdf(pdf_path, rows, note=None):
+    """用 reportlab 產生有一個表格的 PDF（欄位內容會自動換行）
+
+    Args:
+        pdf_path: 輸出的 PDF 路徑
+        rows: 表格內容（每一行是欄位文字的列表）
+        note: 放在表格正下方的備註文字，不提供則沒有備註
+    """
+    pdfmetrics.registerFont(UnicodeCIDFont('MSung-Light'))
+    style = ParagraphStyle('cell', fontName='MSung-Light', fontSize=10, leading=12, wordWrap='CJK')
+
+    # 第一欄用 Paragraph，名稱超過欄寬時會換行
+    cells = []
+    for row in rows:
+        cells.append([Paragraph(row[0], style)] + row[1:])
+
+    table = Table(cells, colWidths=[60, 40, 40])
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'MSung-Light'),
+        ('GRID', (0, 0), (-1, -1), 0.5, 'black'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    flowables = [table]
+    if note:
+        flowables.append(Paragraph(note, style))
+    SimpleDocTemplate(str(pdf_path), pagesize=A4).build(flowables)
+
+
+def make_row(bottom, cells):
+    """建立和 read_page_rows 相同格式的一行（每個字寬 10 點、高 10 點）
+
+    Args:
+        bottom: 這一行的底部 y 座標
+        cells: [(欄位左側 x, 欄位文字), ...]
+    Returns:
+        一行的資料（字典）
+    """
+    return {
+        'bottom': bottom,
+        'height': 10,
+        'cells': [text for left, text in cells],
+        'ranges': [(left, left + 10 * len(text)) for left, text in cells],
+    }
+
+
+def test_has_wrapped_cells_detects_split_course_name():
+    # 「會計學原理與實務演練課程」換成三行，節數在中間那一行
+    rows = [
+        make_row(660, [(230, '數學'), (290, '3'), (330, '3')]),
+        make_row(640, [(230, '會計學原')]),
+        make_row(628, [(230, '理與實務'), (290, '3'), (330, '0')]),
+        make_row(616, [(230, '演練課程')]),
+    ]
+    assert has_wrapped_cells(rows)
+
+
+def test_has_wrapped_cells_detects_hours_between_name_lines():
+    # 名稱換成兩行時，節數在兩行中間，有節數的那一行沒有名稱
+    rows = [
+        make_row(706, [(230, '商業溝通')]),
+        make_row(700, [(290, '2'), (330, '2')]),
+        make_row(694, [(230, '與資訊應')]),
+    ]
+    assert has_wrapped_cells(rows)
+
+
+def test_has_wrapped_cells_ignores_title_rows():
+    rows = [
+        make_row(736, [(230, '教學科目'), (290, '一上'), (330, '一下')]),
+        make_row(718, [(230, '國語文'), (290, '4'), (330, '4')]),
+        make_row(700, [(230, '數學'), (290, '3'), (330, '3')]),
+    ]
+    assert not has_wrapped_cells(rows)
+
+
+def test_has_wrapped_cells_ignores_far_or_wide_notes():
+    rows = [
+        make_row(700, [(230, '數學'), (290, '3'), (330, '3')]),
+        # 離表格超過一行字的備註
+        make_row(680, [(230, '實習另行安排')]),
+    ]
+    assert not has_wrapped_cells(rows)
+
+    rows = [
+        make_row(700, [(230, '數學'), (290, '3'), (330, '3')]),
+        # 緊貼表格，但橫跨到節數欄位的備註
+        make_row(690, [(230, '備註：實習課程另行安排')]),
+    ]
+    assert not has_wrapped_cells(rows)
+
+
+def test_wrapped_course_name_falls_back_to_pdfplumber(tmp_path):
+    pdf_path = tmp_path / 'wrapped.pdf'
+    build_table_pdf(pdf_path, [
+        ['教學科目', '一上', '一下'],
+        ['國語文', '4', '4'],
+        ['商業溝通與資訊應用實務專題', '2', '2'],
+        ['會計學原理與實務演練課程', '3', '0'],
+    ])
+
+    result = parse_curriculum_pdf(str(pdf_path))
+
+    assert result['method'] == 'pdfplumber'
+    assert result['tables_found'] == 1
+    # pdfplumber 依框線取出整格，換行的名稱不會被截斷
+    assert [len(course['name']) for course in result['courses']] == [3, 13, 12]
+
+
+def test_simple_table_uses_pdfium(tmp_path):
+    pdf_path = tmp_path / 'simple.pdf'
+    build_table_pdf(pdf_path, [
+        ['教學科目', '一上', '一下'],
+        ['國語文', '4', '4'],
+        ['數學', '3', '0'],
+    ])
+
+    result = parse_curriculum_pdf(str(pdf_path))
+
+    assert result['method'] == 'pdfium'
+    # PDFium 不會找表格，不回報表格數
+    assert result['tables_found'] is None
+    assert [course['name'] for course in result['courses']] == ['國語文', '數學']
+    assert [course['credits'] for course in result['courses']] == [8, 3]
+
+
+def test_note_under_simple_table_keeps_pdfium(tmp_path):
+    pdf_path = tmp_path / 'note.pdf'
+    build_table_pdf(pdf_path, [
+        ['教學科目', '一上', '一下'],
+        ['國語文', '4', '4'],
+        ['數學', '3', '0'],
+    ], note='備註：實習課程另行安排')
+
+    result = parse_curriculum_pdf(str(pdf_path))
+
+    assert result['method'] == 'pdfium'
+    assert result['error'] is None
+    assert [course['name'] for course in result['courses']] == ['國語文', '數學']
@@ -5,9 +5,12 @@ Excel 課程資料解析工具
 從 teacher.xlsx 讀取課程資料並轉換為系統需要的 JSON 格式
 """
 
-import pandas as pd
 import json
 import os
+import re
+from functools import lru_cache
+
+from python_calamine import CalamineWorkbook
 
 
 # 不需要顯示的課程名稱
@@ -73,6 +76,28 @@ COURSE_DOMAIN_MAP = {
 }
 
 
+# 把排除清單編成一個正規表示式，一次比對就能知道課程名稱是否包含任何一個
+EXCLUDED_PATTERN = re.compile('|'.join(re.escape(name) for name in EXCLUDED_COURSES))
+
+
+@lru_cache(maxsize=None)
+def lookup_course_domain(course_name):
+    """從對照表找出課程所屬領域
+
+    同一門課在每個科系都會出現，結果會被快取，每個課程名稱只需比對一次
+
+    Args:
+        course_name: 課程名稱
+    Returns:
+        領域名稱，找不到則回傳空字串
+    """
+    # 依對照表順序比對，第一個符合的為準
+    for key, domain_value in COURSE_DOMAIN_MAP.items():
+        if key in course_name:
+            return domain_value
+    return ''
+
+
 def parse_courses_from_excel(excel_path):
     """從 Excel 讀取課程資料
 
@@ -82,7 +107,11 @@ def parse_courses_from_excel(excel_path):
         課程資料字典
     """
     # 讀取第二個工作表（113課程節數預估表）
-    df = pd.read_excel(excel_path, sheet_name=1, header=None)
+    # 用 calamine 只讀取儲存格的值（不解析格式），直接得到每一行的列表
+    # skip_empty_area=False 保留開頭的空白行和欄，行列編號才會和 Excel 一致
+    # 空白格會讀成空字串 ''
+    workbook = CalamineWorkbook.from_path(excel_path)
+    rows = workbook.get_sheet_by_index(1).to_python(skip_empty_area=False)
 
     # 科系欄位對應（一年級上下、二年級上下、三年級上下）
     # 根據 Excel 實際結構：多媒(3,4)、資處(5,6)、會計(7,8)、商經(9,10)、應英(11,12) 為一年級
@@ -148,12 +177,10 @@ def parse_courses_from_excel(excel_path):
         current_domain = ''
 
         # 從第 5 行開始讀取課程（跳過標題列，實際課程從 Row 4 開始）
-        for row_idx in range(4, len(df)):
-            row = df.iloc[row_idx]
-
+        for row in rows[4:]:
             # 檢查是否為領域標題（第2欄）
-            domain_cell = str(row.iloc[1]).strip() if pd.notna(row.iloc[1]) else ''
-            if domain_cell and domain_cell != 'nan':
+            domain_cell = str(row[1]).strip()
+            if domain_cell:
                 # 處理領域名稱
                 domain_cell = domain_cell.replace('\n', '').replace(' ', '')
                 if '國文' in domain_cell or '社會' in domain_cell:
@@ -174,18 +201,13 @@ def parse_courses_from_excel(excel_path):
                     current_domain = '藝能'
 
             # 課程名稱（第3欄）
-            course_name = str(row.iloc[2]).strip() if pd.notna(row.iloc[2]) else ''
+            course_name = str(row[2]).strip()
 
-            if not course_name or course_name == 'nan':
+            if not course_name:
                 continue
 
             # 檢查是否為要排除的課程
-            should_exclude = False
-            for excluded in EXCLUDED_COURSES:
-                if excluded in course_name:
-                    should_exclude = True
-                    break
-            if should_exclude:
+            if EXCLUDED_PATTERN.search(course_name):
                 continue
 
             # 收集各學期節數
@@ -194,13 +216,10 @@ def parse_courses_from_excel(excel_path):
 
             for sem_key, col_idx in cols.items():
                 if col_idx < len(row):
-                    val = row.iloc[col_idx]
-                    if pd.notna(val):
-                        try:
-                            semesters[sem_key] = int(float(val))
-                        except (ValueError, TypeError):
-                            semesters[sem_key] = 0
-                    else:
+                    # 空白格 '' 轉換失敗，一樣算 0 節
+                    try:
+                        semesters[sem_key] = int(float(row[col_idx]))
+                    except (ValueError, TypeError):
                         semesters[sem_key] = 0
                 else:
                     semesters[sem_key] = 0
@@ -211,13 +230,9 @@ def parse_courses_from_excel(excel_path):
             # 如果該科系有這門課（至少有一個學期有節數）
             if total_credits > 0:
                 # 決定課程領域：優先使用對照表，其次使用 current_domain
-                final_domain = current_domain
-
-                # 檢查課程名稱是否在對照表中
-                for key, domain_value in COURSE_DOMAIN_MAP.items():
-                    if key in course_name:
-                        final_domain = domain_value
-                        break
+                final_domain = lookup_course_domain(course_name)
+                if not final_domain:
+                    final_domain = current_domain
 
                 course = {
                     'domain': final_domain,
@@ -232,8 +247,14 @@ def parse_courses_from_excel(excel_path):
     return courses_data
 
 
-def save_courses_json(data, output_path):
-    """儲存課程資料到 JSON 檔案"""
+def save_courses_json(data, output_path, verbose=False):
+    """儲存課程資料到 JSON 檔案
+
+    Args:
+        data: 課程資料
+        output_path: 輸出檔案路徑
+        verbose: 是否印出各科系、各領域的課程統計（需要再跑一次所有課程）
+    """
     from datetime import datetime
     data['last_updated'] = datetime.now().strftime('%Y-%m-%d')
 
@@ -242,6 +263,16 @@ def save_courses_json(data, output_path):
 
     print(f"課程資料已儲存到 {output_path}")
     print(f"共 {len(data['departments'])} 個科系")
+    if verbose:
+        print_courses_stats(data)
+
+
+def print_courses_stats(data):
+    """印出各科系、各領域的課程數
+
+    Args:
+        data: 課程資料
+    """
     for dept in data['departments']:
         print(f"  - {dept['name']}: {len(dept['courses'])} 門課程")
 
@@ -262,6 +293,6 @@ if __name__ == '__main__':
 
     if os.path.exists(excel_path):
         courses = parse_courses_from_excel(excel_path)
-        save_courses_json(courses, output_path)
+        save_courses_json(courses, output_path, verbose=True)
     else:
         print(f"找不到檔案: {excel_path}")
@@ -7,40 +7,300 @@ PDF 課綱解析工具
 2. 找出課程名稱和節數
 3. 過濾掉表格標題等非課程資料
 
+讀取方式：
+- 優先用 PDFium（pypdfium2，C++ 函式庫）擷取文字，依每個字的座標排回表格的行和欄，速度快很多
+- PDFium 找不到任何課程，或表格中有換行的欄位（座標無法判斷屬於哪一行）時，
+  改用 pdfplumber 依表格框線擷取
+
 設計原則：簡單、易懂、好維護
 """
 
+import re
+
 import pdfplumber
+import pypdfium2 as pdfium
+
+
+# 這些關鍵字出現時，代表這行是標題或小計，不是課程
+# 用簡單的方式過濾
+TITLE_KEYWORDS = [
+    '教學科目', '學分', '節數', '表', '課程類別',
+    '學年度', '入學', '適用', '部定', '校訂',
+    '必修', '選修', '名稱', '類別', '群科',
+    '一年級', '二年級', '三年級', '上', '下',
+    '科目', '領域', '商業與管理', '設計群',
+    '小計', '總計', '合計', '總節數'  # 過濾小計行
+]
+
+# 把所有關鍵字編成一個正規表示式，一次比對就能知道是否包含任何一個
+TITLE_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in TITLE_KEYWORDS))
+
+# 中文字的範圍（用來判斷課程名稱是否包含中文）
+CHINESE_PATTERN = re.compile('[\u4e00-\u9fff]')
+
+# 兩個字的底部 y 座標相差在這個範圍內（單位：點），視為同一行
+ROW_TOLERANCE = 3
+# 同一行中兩個字的間距超過這個距離（單位：點），視為不同欄位
+CELL_GAP = 5
+# 欄位換行時，上下兩行的距離不會超過字高的這個倍數
+WRAP_LINE_SPACING = 1.3
 
 
 def parse_curriculum_pdf(pdf_path):
     """解析課綱 PDF 檔案
 
+    先用 PDFium 快速解析；失敗、找不到任何課程或有換行的欄位時，再改用 pdfplumber
+
     Args:
         pdf_path: PDF 檔案的路徑
     Returns:
         解析結果（字典格式）
     """
-    # 準備回傳的結果
+    result = parse_pdf_with_pdfium(pdf_path)
+    if result['success'] and result['courses']:
+        return result
+    return parse_pdf_with_pdfplumber(pdf_path)
+
+
+def create_empty_result(method):
+    """建立空白的解析結果
+
+    Args:
+        method: 使用的解析方式（'pdfium' 或 'pdfplumber'）
+    Returns:
+        解析結果（字典格式）
+    """
     result = {
         'success': True,
+        'method': method,
         'pages_count': 0,
         'tables_found': 0,
         'courses': [],
-        'raw_tables': [],
         'error': None
     }
+    # PDFium 只依座標排行，不會找出表格，所以沒有表格數
+    if method == 'pdfium':
+        result['tables_found'] = None
+    return result
+
+
+def parse_pdf_with_pdfium(pdf_path):
+    """用 PDFium 擷取文字，依座標排成表格的行後解析
+
+    Args:
+        pdf_path: PDF 檔案的路徑
+    Returns:
+        解析結果（字典格式）
+    """
+    result = create_empty_result('pdfium')
+    row_buffer = []
+
+    try:
+        with pdfium.PdfDocument(pdf_path) as pdf:
+            result['pages_count'] = len(pdf)
+
+            # 逐頁處理
+            for page_index in range(len(pdf)):
+                page = pdf[page_index]
+                rows = read_page_rows(page)
+                page.close()
+
+                # 欄位換行時，只靠座標會把一個欄位拆成好幾行，交給 pdfplumber 處理
+                if has_wrapped_cells(rows):
+                    result['success'] = False
+                    result['error'] = f'第 {page_index + 1} 頁有換行的欄位，無法用座標判斷表格'
+                    break
+
+                for row in rows:
+                    course = try_parse_course_row(row['cells'], row_buffer)
+                    if course:
+                        result['courses'].append(course)
+
+    except Exception as e:
+        result['success'] = False
+        result['error'] = str(e)
+
+    return result
+
+
+def read_page_rows(page):
+    """讀取一頁的文字，依座標排成表格的行
+
+    底部 y 座標相近的字屬於同一行；同一行內由左到右排列，
+    兩個字之間距離夠遠就是不同欄位
+
+    Args:
+        page: pypdfium2 的頁面
+    Returns:
+        每一行的資料（列表），每一行是字典：
+        - bottom: 這一行的底部 y 座標
+        - height: 這一行最高的字的高度
+        - cells: 欄位文字的列表
+        - ranges: 每個欄位的 (左側 x, 右側 x)
+    """
+    # PDF 的 y 座標由下往上，由大到小排序就是由上而下
+    chars = read_page_chars(page)
+    chars.sort(reverse=True)
+
+    # 依 y 座標分行
+    lines = []
+    for bottom, left, right, top, char in chars:
+        if not lines or lines[-1]['bottom'] - bottom > ROW_TOLERANCE:
+            lines.append({'bottom': bottom, 'height': 0, 'chars': []})
+        line = lines[-1]
+        line['height'] = max(line['height'], top - bottom)
+        line['chars'].append((left, right, char))
+
+    rows = []
+    for line in lines:
+        cells = split_line_into_cells(line['chars'])
+        rows.append({
+            'bottom': line['bottom'],
+            'height': line['height'],
+            'cells': [text for left, right, text in cells],
+            'ranges': [(left, right) for left, right, text in cells],
+        })
+    return rows
+
+
+def read_page_chars(page):
+    """取出一頁中每個字和它的位置
+
+    Args:
+        page: pypdfium2 的頁面
+    Returns:
+        [(底部 y, 左側 x, 右側 x, 頂部 y, 字), ...]，不含空白和換行
+    """
+    textpage = page.get_textpage()
+    chars = []
+    for i in range(textpage.count_chars()):
+        char = textpage.get_text_range(i, 1)
+        if not char or char.isspace():
+            continue
+        # loose=True 用字型大小計算範圍，中文字才不會得到高度為 0 的框
+        left, bottom, right, top = textpage.get_charbox(i, loose=True)
+        chars.append((bottom, left, right, top, char))
+    textpage.close()
+    return chars
+
+
+def split_line_into_cells(line):
+    """把同一行的字依左右距離切成欄位
+
+    Args:
+        line: [(左側 x, 右側 x, 字), ...]
+    Returns:
+        [[左側 x, 右側 x, 欄位文字], ...]
+    """
+    cells = []
+    for left, right, char in sorted(line):
+        if not cells or left - cells[-1][1] > CELL_GAP:
+            cells.append([left, right, ''])
+        cells[-1][1] = right
+        cells[-1][2] += char
+    return cells
+
+
+def has_wrapped_cells(rows):
+    """檢查是否有換行的欄位
+
+    課程名稱太長自動換行時，名稱會被拆成好幾行，只有一行和節數在同一行。
+    判斷方式：有中文、沒有節數、不是標題的行，緊鄰著有節數的行，
+    而且上下距離不超過一行字、位置在課程名稱那一欄。
+    表格上方的說明、下方的備註通常離得較遠或不在課程名稱欄，不會被當成換行。
+
+    Args:
+        rows: 依座標排好的行（read_page_rows 的結果）
+    Returns:
+        True 表示有換行的欄位
+    """
+    for i, row in enumerate(rows):
+        if not is_text_only_row(row['cells']):
+            continue
+        if i > 0 and is_wrapped_line(row, rows[i - 1]):
+            return True
+        if i + 1 < len(rows) and is_wrapped_line(row, rows[i + 1]):
+            return True
+    return False
+
+
+def is_wrapped_line(text_row, hours_row):
+    """判斷只有文字的一行，是否是有節數那一行的課程名稱換行
+
+    Args:
+        text_row: 只有文字的行
+        hours_row: 相鄰的行
+    Returns:
+        True 表示是換行的課程名稱
+    """
+    # 找出第一個節數欄位，它左邊的欄位就是課程名稱欄
+    hours_index = find_hours_index(hours_row['cells'])
+    if hours_index is None:
+        return False
+
+    # 上下距離要在一行字左右
+    line_gap = abs(text_row['bottom'] - hours_row['bottom'])
+    if line_gap > hours_row['height'] * WRAP_LINE_SPACING:
+        return False
+
+    # 文字要在節數欄位的左邊
+    text_left = text_row['ranges'][0][0]
+    text_right = text_row['ranges'][-1][1]
+    if text_right > hours_row['ranges'][hours_index][0]:
+        return False
+
+    # 節數那一行也有課程名稱時，文字要和課程名稱左右重疊
+    # （名稱換成偶數行時，節數會在兩行中間，那一行就沒有名稱）
+    if hours_index > 0:
+        name_left, name_right = hours_row['ranges'][hours_index - 1]
+        if text_right < name_left or text_left > name_right:
+            return False
+
+    return True
+
+
+def is_text_only_row(row):
+    """判斷一行是否只有中文文字（沒有節數、也不是標題）
+
+    Args:
+        row: 欄位文字的列表
+    Returns:
+        True 表示只有中文文字
+    """
+    text = ''.join(row)
+    if not CHINESE_PATTERN.search(text):
+        return False
+    if TITLE_PATTERN.search(text):
+        return False
+    return find_hours_index(row) is None
+
+
+def find_hours_index(row):
+    """找出一行中第一個節數欄位的位置
+
+    Args:
+        row: 欄位文字的列表
+    Returns:
+        欄位的位置（整數），沒有節數則回傳 None
+    """
+    for i, cell in enumerate(row):
+        if parse_hours(cell) is not None:
+            return i
+    return None
 
-    # 這些關鍵字出現時，代表這行是標題或小計，不是課程
-    # 用簡單的方式過濾
-    title_keywords = [
-        '教學科目', '學分', '節數', '表', '課程類別',
-        '學年度', '入學', '適用', '部定', '校訂',
-        '必修', '選修', '名稱', '類別', '群科',
-        '一年級', '二年級', '三年級', '上', '下',
-        '科目', '領域', '商業與管理', '設計群',
-        '小計', '總計', '合計', '總節數'  # 過濾小計行
-    ]
+
+def parse_pdf_with_pdfplumber(pdf_path):
+    """用 pdfplumber 擷取表格後解析（較慢，但能處理複雜的表格版面）
+
+    Args:
+        pdf_path: PDF 檔案的路徑
+    Returns:
+        解析結果（字典格式）
+    """
+    result = create_empty_result('pdfplumber')
+
+    # 所有行共用同一個列表存放清理後的欄位，不必每行重新建立
+    row_buffer = []
 
     try:
         # 開啟 PDF 檔案
@@ -48,7 +308,7 @@ def parse_curriculum_pdf(pdf_path):
             result['pages_count'] = len(pdf.pages)
 
             # 逐頁處理
-            for page_num, page in enumerate(pdf.pages):
+            for page in pdf.pages:
                 # 嘗試擷取表格
                 tables = page.extract_tables()
 
@@ -63,16 +323,14 @@ def parse_curriculum_pdf(pdf_path):
                         # 處理表格中的每一行
                         for row in table:
                             # 嘗試解析這一行
-                            course = try_parse_course_row(row, title_keywords)
+                            course = try_parse_course_row(row, row_buffer)
 
                             if course:
                                 result['courses'].append(course)
 
-                        # 儲存原始表格（除錯用）
-                        result['raw_tables'].append({
-                            'page': page_num + 1,
-                            'rows': len(table)
-                        })
+                # 處理完就釋放這一頁的快取（文字、框線等），避免大檔案佔用大量記憶體
+                del tables
+                page.close()
 
     except Exception as e:
         result['success'] = False
@@ -81,17 +339,17 @@ def parse_curriculum_pdf(pdf_path):
     return result
 
 
-def try_parse_course_row(row, title_keywords):
+def try_parse_course_row(row, cleaned_row=None):
     """嘗試解析一行資料，判斷是否為課程
 
     判斷邏輯：
     1. 第一欄應該是課程名稱（中文字，2-20字）
     2. 後面應該有數字（節數）
-    3. 不能包含標題關鍵字
+    3. 不能包含標題關鍵字（TITLE_KEYWORDS）
 
     Args:
         row: 表格的一行資料（列表）
-        title_keywords: 標題關鍵字列表
+        cleaned_row: 可重複使用的暫存列表（會被清空），不提供則自動建立
     Returns:
         課程資料（字典）或 None
     """
@@ -100,7 +358,9 @@ def try_parse_course_row(row, title_keywords):
         return None
 
     # 清理每個欄位
-    cleaned_row = []
+    if cleaned_row is None:
+        cleaned_row = []
+    cleaned_row.clear()
     for cell in row:
         if cell is None:
             cleaned_row.append('')
@@ -122,13 +382,11 @@ def try_parse_course_row(row, title_keywords):
         return None
 
     # 檢查是否為標題（包含標題關鍵字）
-    for keyword in title_keywords:
-        if keyword in course_name:
-            return None
+    if TITLE_PATTERN.search(course_name):
+        return None
 
     # 檢查課程名稱是否合理（至少有一個中文字）
-    has_chinese = any('\u4e00' <= char <= '\u9fff' for char in course_name)
-    if not has_chinese:
+    if not CHINESE_PATTERN.search(course_name):
         return None
 
     # 找出數字（節數）
@@ -137,13 +395,9 @@ def try_parse_course_row(row, title_keywords):
         if i == name_index:
             continue  # 跳過課程名稱欄
 
-        # 嘗試轉換成數字
-        try:
-            num = int(float(cell))
-            if 0 <= num <= 20:  # 合理的節數範圍
-                numbers.append(num)
-        except (ValueError, TypeError):
-            pass
+        num = parse_hours(cell)
+        if num is not None:
+            numbers.append(num)
 
     # 如果沒有找到數字，可能不是課程行
     if len(numbers) == 0:
@@ -166,6 +420,35 @@ def try_parse_course_row(row, title_keywords):
     }
 
 
+def parse_hours(cell):
+    """把一個欄位轉成節數
+
+    空欄位和純數字是最常見的情況，先直接判斷，
+    只有其他格式（如 '2.0'）才用 try/except 轉換，避免大量例外處理拖慢速度。
+
+    Args:
+        cell: 清理過的欄位文字
+    Returns:
+        節數（0-20 的整數），不是合理的節數則回傳 None
+    """
+    # 空欄位直接跳過
+    if not cell:
+        return None
+
+    if cell.isdecimal():
+        num = int(cell)
+    else:
+        try:
+            num = int(float(cell))
+        except (ValueError, OverflowError):
+            return None
+
+    # 合理的節數範圍
+    if 0 <= num <= 20:
+        return num
+    return None
+
+
 def test_pdf_parser(pdf_path):
     """測試 PDF 解析功能
 
@@ -179,8 +462,10 @@ def test_pdf_parser(pdf_path):
 
     result = parse_curriculum_pdf(pdf_path)
 
+    print(f"解析方式: {result['method']}")
     print(f"頁數: {result['pages_count']}")
-    print(f"找到表格數: {result['tables_found']}")
+    if result['tables_found'] is not None:
+        print(f"找到表格數: {result['tables_found']}")
     print(f"解析到的課程數: {len(result['courses'])}")
 
     if result['courses']: